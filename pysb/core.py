@@ -247,6 +247,9 @@ class Monomer(Component):
             See MonomerPattern.site_conditions.
 
         """
+        # fast path for the common no-argument conversion to a pattern
+        if conditions is None and not kwargs:
+            return MonomerPattern(self, {}, None)
         return MonomerPattern(self, extract_site_conditions(conditions, **kwargs), None)
 
     def __repr__(self):
@@ -344,6 +347,17 @@ class MonomerPattern(object):
 
     """
 
+    # Patterns are allocated in large numbers by the macro layer, so avoid
+    # a per-instance __dict__. The explicit state methods keep them
+    # picklable under protocol 0 (as used by pysb.testing).
+    __slots__ = ('monomer', 'site_conditions', 'compartment', '__weakref__')
+
+    def __getstate__(self):
+        return self.monomer, self.site_conditions, self.compartment
+
+    def __setstate__(self, state):
+        self.monomer, self.site_conditions, self.compartment = state
+
     def __init__(self, monomer, site_conditions, compartment):
         # ensure all keys in site_conditions are sites in monomer
         unknown_sites = [site for site in site_conditions.keys() if site not in monomer.sites]
@@ -412,7 +426,11 @@ class MonomerPattern(object):
         # compartment, and a shallow copy of site_conditions which has been
         # updated according to our args (as in Monomer.__call__).
         site_conditions = self.site_conditions.copy()
-        site_conditions.update(extract_site_conditions(conditions, **kwargs))
+        # no-argument calls request a plain copy, so skip the update; a copy
+        # must still be returned because callers like __pow__ mutate it
+        if conditions is not None or kwargs:
+            site_conditions.update(extract_site_conditions(conditions,
+                                                           **kwargs))
         return MonomerPattern(self.monomer, site_conditions, self.compartment)
 
     def __add__(self, other):
@@ -490,6 +508,15 @@ class ComplexPattern(object):
 
     """
 
+    __slots__ = ('monomer_patterns', 'compartment', 'match_once',
+                 '__weakref__')
+
+    def __getstate__(self):
+        return self.monomer_patterns, self.compartment, self.match_once
+
+    def __setstate__(self, state):
+        self.monomer_patterns, self.compartment, self.match_once = state
+
     def __init__(self, monomer_patterns, compartment, match_once=False):
         # ensure compartment is a Compartment
         if compartment and not isinstance(compartment, Compartment):
@@ -601,6 +628,14 @@ class ReactionPattern(object):
 
     """
 
+    __slots__ = ('complex_patterns', '__weakref__')
+
+    def __getstate__(self):
+        return (self.complex_patterns,)
+
+    def __setstate__(self, state):
+        (self.complex_patterns,) = state
+
     def __init__(self, complex_patterns):
         self.complex_patterns = complex_patterns
 
@@ -655,6 +690,17 @@ class RuleExpression(object):
 
     """
 
+    __slots__ = ('reactant_pattern', 'product_pattern', 'is_reversible',
+                 '__weakref__')
+
+    def __getstate__(self):
+        return (self.reactant_pattern, self.product_pattern,
+                self.is_reversible)
+
+    def __setstate__(self, state):
+        (self.reactant_pattern, self.product_pattern,
+         self.is_reversible) = state
+
     def __init__(self, reactant_pattern, product_pattern, is_reversible):
         self.reactant_pattern = reactant_pattern
         self.product_pattern = product_pattern
@@ -1341,14 +1387,29 @@ class ComponentSet(collections.Set, collections.Mapping, collections.Sequence):
         return len(self._elements)
 
     def add(self, c):
-        if c not in self:
-            if c.name in self._map:
-                raise ComponentDuplicateNameError(
-                    "Tried to add a component with a duplicate name: %s"
-                    % c.name)
+        # one dict probe instead of the membership test plus a second name
+        # lookup; add is the hot path under update and the set operators
+        if not isinstance(c, Component):
+            raise TypeError("Can only work with Components, got a %s"
+                            % type(c))
+        existing = self._map.get(c.name)
+        if existing is None:
             self._elements.append(c)
             self._map[c.name] = c
             self._index_map[c.name] = len(self._elements) - 1
+        elif existing is not c:
+            raise ComponentDuplicateNameError(
+                "Tried to add a component with a duplicate name: %s"
+                % c.name)
+
+    def update(self, iterable):
+        """Adds the elements of `iterable` to this set, in place.
+
+        Unlike the | operator this does not build a new ComponentSet, so it
+        is the preferred way to accumulate components in a loop.
+        """
+        for component in iterable:
+            self.add(component)
 
     def __getitem__(self, key):
         # Must support both Sequence and Mapping behavior. This means
@@ -1,8 +1,10 @@
 import pysb.bng
-import numpy 
-import re 
-import ctypes
+import numpy
+import sympy
+import re
 import scipy.interpolate
+import scipy.special
+import distutils.errors
 import sys
 #from pysundials import cvode
 from scipy.integrate import odeint
@@ -14,6 +16,15 @@ import random
 # Thee set of functions set up the system for annealing runs
 # and provide the runner function as input to annealing
 
+use_inline = False
+# try to inline a C statement to see if weave is present and functional
+try:
+    from scipy.weave import inline
+    inline('int i;', force=1)
+    use_inline = True
+except (distutils.errors.CompileError, ImportError):
+    pass
+
 def spinner(i):
     spin = ("|", "/","-", "\\")
     print "\r[%s] %d"%(spin[i%4],i),
@@ -33,48 +44,90 @@ def odeinit(model, reltol=1.0e-3, abstol=1.0e-3, nsteps = 1000, itermaxstep = No
     # init the arrays we need
     yzero = numpy.zeros(odesize)  #initial values for yzero
 
+    # resolve the initial-condition species indices once; odesolve re-applies
+    # the initial conditions on every call and get_species_index is a linear
+    # scan of the species list
+    ic_indices = numpy.array([model.get_species_index(cplxptrn)
+                              for cplxptrn, ic_param in model.initial_conditions],
+                             dtype=numpy.intp)
+    ic_params = [ic_param for cplxptrn, ic_param in model.initial_conditions]
+
     # assign the initial conditions
-    for cplxptrn, ic_param in model.initial_conditions:
-        speci = model.get_species_index(cplxptrn)
-        yzero[speci] = ic_param.value
+    yzero[ic_indices] = [ic_param.value for ic_param in ic_params]
 
     # initialize y with the yzero values
     y = yzero.copy()
 
-    # make a dict of ydot functions. notice the functions are in this namespace.
-    # replace the kxxxx constants with elements from the params array
-    rhs_exprs = []
-    for i in range(0,odesize):
-        # first get the function string from sympy, replace the the "sN" with y[N]
-        tempstring = re.sub(r's(\d+)', lambda m: 'y[%s]'%(int(m.group(1))), str(model.odes[i]))
-        # now replace the constants with 'p' array names; cycle through the whole list
-        #for j in range(0, numparams):
-        #    tempstring = re.sub('(?<![A-Za-z0-9_])%s(?![A-Za-z0-9_])'%(model.parameters[j].name),'p[%d]'%(j), tempstring)
-        for j, parameter in enumerate(model.parameters):
-            tempstring = re.sub('(?<![A-Za-z0-9_])%s(?![A-Za-z0-9_])' % parameter.name, 'p[%d]' % j, tempstring)
-        # make a list of compiled rhs expressions which will be run by the integrator
-        # use the ydots to build the function for analysis
-        # (second arg is the "filename", useful for exception/debug output)
-        rhs_exprs.append(compile(tempstring, '<ydot[%s]>' % i, 'eval'))
-
-    # Create the structure to hold the parameters when calling the function
-    # This results in a generic "p" array
+    # map the "sN" species symbols and the parameter-name symbols onto generic
+    # y/p symbol arrays, then lambdify the whole ODE system at once. this gives
+    # a single vectorized numpy callable instead of one eval() per equation per
+    # integrator step.
     numparams = len(model.parameters)
-    class UserData(ctypes.Structure):
-        _fields_ = [('p', ctypes.c_float*numparams)]
-    PUserData = ctypes.POINTER(UserData)
-    data = UserData() 
-
-    data.p[:] = [p.value for p in model.parameters]
-    paramarray = numpy.array([p.value for p in model.parameters])
-
-    def f(y, t):
-        """ Evaluate dy/dt for y at time t """
-        rhs_locals = {'y': y, 'p': data.p}
-        ydot = numpy.zeros(len(model.odes))
-        for i in range(0, len(model.odes)):
-            ydot[i] = eval(rhs_exprs[i], rhs_locals)
-        return ydot
+    sym_y = [sympy.Symbol('y%d' % i) for i in range(odesize)]
+    sym_p = [sympy.Symbol('p%d' % j) for j in range(numparams)]
+    symmap = dict((sympy.Symbol('s%d' % i), sym_y[i]) for i in range(odesize))
+    symmap.update((sympy.Symbol(parameter.name), sym_p[j])
+                  for j, parameter in enumerate(model.parameters))
+    # substitute directly on the sympy expressions, no string rewriting
+    # needed; xreplace is a pure structural exchange, with none of subs()'s
+    # sympify/pattern-matching overhead
+    rhs_exprs = [model.odes[i].xreplace(symmap) for i in range(odesize)]
+
+    # fold the observable coefficients into a dense (nobs, nspecies) matrix
+    # so odesolve can project all the observables with one matrix product
+    obsmat = numpy.zeros((len(model.observables), odesize))
+    for i, obs in enumerate(model.observables):
+        obsmat[i, obs.species] = obs.coefficients
+
+    # the generic "p" array the RHS closures read their parameters from
+    paramarray = numpy.ascontiguousarray([p.value for p in model.parameters],
+                                        dtype=numpy.float64)
+
+    ydot = numpy.empty(odesize)
+    if use_inline:
+        # emit the whole RHS as one block of C statements and compile it once
+        # with weave; the inline call writes into the preallocated ydot buffer
+        # with no per-equation Python dispatch at all
+        code_eqs = '\n'.join('ydot[%d] = %s;' % (i, sympy.ccode(rhs_exprs[i]))
+                             for i in range(odesize))
+        code_eqs = re.sub(r'\by(\d+)\b', r'y[\1]', code_eqs)
+        code_eqs = re.sub(r'\bp(\d+)\b', r'p[\1]', code_eqs)
+
+        def f(y, t):
+            """ Evaluate dy/dt for y at time t """
+            p = paramarray
+            inline(code_eqs, ['ydot', 'y', 'p'])
+            return ydot
+
+        # compile now rather than lazily on the first integration: parmeval
+        # workers are forked after odeinit, so a single build here is
+        # inherited by every worker, and weave also caches the built
+        # extension on disk keyed by the code text so later processes with
+        # the same equations just import the existing module
+        f(numpy.asarray(y, dtype=numpy.float64), 0.0)
+    else:
+        rhs_func = sympy.lambdify((sym_y, sym_p), sympy.Matrix(rhs_exprs),
+                                  modules=[{'ImmutableMatrix': numpy.array},
+                                           'numpy'])
+
+        def f(y, t):
+            """ Evaluate dy/dt for y at time t """
+            # fill the shared buffer; odeint copies the returned array, so
+            # reusing it across calls is safe
+            ydot[:] = numpy.asarray(rhs_func(y, paramarray)).ravel()
+            return ydot
+
+    # analytic jacobian of the RHS, evaluated the same way; lsoda can use it
+    # in stiff regions instead of estimating one column per species by
+    # finite differences
+    jac_func = sympy.lambdify((sym_y, sym_p),
+                              sympy.Matrix(rhs_exprs).jacobian(sym_y),
+                              modules=[{'ImmutableMatrix': numpy.array},
+                                       'numpy'])
+
+    def jac(y, t):
+        """ Evaluate the Jacobian d(ydot)/dy at y """
+        return numpy.asarray(jac_func(y, paramarray))
 
     #list of outputs
     xout = numpy.zeros(nsteps)
@@ -87,7 +140,7 @@ def odeinit(model, reltol=1.0e-3, abstol=1.0e-3, nsteps = 1000, itermaxstep = No
     for i in range(0, odesize):
         yout[0][i] = y[i]
     
-    return [f, rhs_exprs, y, odesize, data, xout, yout, nsteps, yzero, reltol, abstol], paramarray
+    return [f, jac, rhs_exprs, y, odesize, paramarray, obsmat, xout, yout, nsteps, yzero, reltol, abstol, ic_indices, ic_params], paramarray
 
 
 def odesolve(model, tfinal, envlist, params, useparams=None, tinit = 0.0, ic=True):
@@ -102,18 +155,16 @@ def odesolve(model, tfinal, envlist, params, useparams=None, tinit = 0.0, ic=Tru
     abstol: absolute tolerance
     ic: reinitialize initial conditions to a value in params or useparams
     '''
-    (f, rhs_exprs, y, odesize, data, xout, yout, nsteps, yzero, reltol, abstol) = envlist
+    (f, jac, rhs_exprs, y, odesize, paramarray, obsmat, xout, yout, nsteps, yzero, reltol, abstol, ic_indices, ic_params) = envlist
 
     #set the initial values and params in each run
     #all parameters are used in annealing. initial conditions are not, here
+    # update paramarray in place; f holds a reference to it in its closure
     if useparams is None:
-        for i in range(len(params)):
-            data.p[i] = params[i]
+        paramarray[:len(params)] = params
     else:
         #only a subset of parameters are used for annealing
-        for i in range(len(useparams)):
-            #print "changing parameter", model.parameters[useparams[i]],"data.p", data.p[useparams[i]],"to", params[i]
-            data.p[useparams[i]] = params[i]
+        paramarray[useparams] = params
 
     # FIXME:
     # update yzero if initial conditions are being modified as part of the parameters
@@ -123,34 +174,45 @@ def odesolve(model, tfinal, envlist, params, useparams=None, tinit = 0.0, ic=Tru
     # initial conditions are contained as part of the model.parameters list.
     #
     if ic is True:
-        for cplxptrn, ic_param in model.initial_conditions:
-            speci = model.get_species_index(cplxptrn)
-            yzero[speci] = ic_param.value
-            
+        yzero[ic_indices] = [ic_param.value for ic_param in ic_params]
+
 
     #reset initial concentrations
     y = yzero.copy()
 
     xout = numpy.linspace(tinit, tfinal, nsteps)
 
-    yout = odeint(f, yzero, xout)
+    # pass the tolerances from odeinit through to lsoda; the defaults are
+    # much tighter than we need for annealing/sensitivity runs
+    yout = odeint(f, yzero, xout, Dfun=jac, rtol=reltol, atol=abstol)
 
     #now deal with observables
-    #obs_names = [name for name, rp in model.observable_patterns]
-    yobs = numpy.zeros([len(model.observables), nsteps])
-    
-    #sum up the correct entities
-    for i, obs in enumerate(model.observables):
-        coeffs = obs.coefficients
-        specs  = obs.species
-        yobs[i] = (yout[:, specs] * coeffs).sum(1)
+    #sum up the correct entities with a single (nobs, nspecies) x
+    #(nspecies, nsteps) product
+    yobs = numpy.dot(obsmat, yout.T)
 
     #merge the x and y arrays for easy analysis
     xyobs = numpy.vstack((xout, yobs))
 
     return (xyobs,xout,yout, yobs)
 
-def compare_data(xparray, simarray, xspairlist, vardata=False):
+def make_regridder(simtime, xptime):
+    """Build a dense weight matrix W such that W.dot(ysim) linearly
+    interpolates a trajectory sampled at simtime onto the experimental time
+    points xptime. The simulation grid is fixed across a whole parameter
+    sweep, so building W once is much cheaper than fitting a fresh spline
+    for every trajectory."""
+    simtime = numpy.asarray(simtime)
+    xptime = numpy.asarray(xptime)
+    idx = numpy.clip(numpy.searchsorted(simtime, xptime), 1, len(simtime) - 1)
+    frac = (xptime - simtime[idx - 1]) / (simtime[idx] - simtime[idx - 1])
+    W = numpy.zeros((len(xptime), len(simtime)))
+    rows = numpy.arange(len(xptime))
+    W[rows, idx - 1] = 1.0 - frac
+    W[rows, idx] = frac
+    return W
+
+def compare_data(xparray, simarray, xspairlist, vardata=False, regridder=None):
     """Compares two arrays of different size and returns the X^2 between them.
     Uses the X axis as the unit to re-grid both arrays. 
     xparray: experimental data
@@ -168,38 +230,58 @@ def compare_data(xparray, simarray, xspairlist, vardata=False):
     # This prob should figure out the overlap of the two arrays and 
     # get a spline of the overlap. For now just assume the simarray domain
     # is bigger than the xparray. FIXME FIXME FIXME
-    #rngmax = min(xparray[0].max(), simarray[0].max())
-    #rngmin = round(rngmin, -1)
-    #rngmax = round(rngmax, -1)
-    #print "Time overlap range:", rngmin,"to", rngmax
-    
-    ipsimarray = numpy.zeros(xparray.shape[1])
+
+    #some error checking
+    for pair in xspairlist:
+        assert type(pair) is tuple
+        assert len(pair) == 2
+
+    numpy.seterr(divide='ignore') # FIXME: added to remove the warnings... use caution!!
+
+    if regridder is not None:
+        # batched path: regrid every requested observable with one matrix
+        # product and score them all at once
+        xpaxes = [pair[0] for pair in xspairlist]
+        simaxes = [pair[1] for pair in xspairlist]
+        ipsimarray = numpy.dot(simarray[simaxes], regridder.T)
+
+        # we now have x and y axis for the points in the model array
+        # calculate the objective function
+        #                        1
+        # obj(t, params) = -------------(S_sim(t,params)-S_exp(t))^2
+        #                  2*sigma_exp^2
+        diffsqarray = (ipsimarray - xparray[xpaxes]) ** 2
+        if vardata is True:
+            # variance data provided in xparray in next column
+            xparrayvar = xparray[[axis + 1 for axis in xpaxes]]
+        else:
+            # assume a default variance
+            xparrayvar = (xparray[xpaxes]*.1) ** 2 # within 10%? FIXME: check w will about this
+        xparrayvar = xparrayvar*2.0
+        objarray = diffsqarray / xparrayvar
+
+        # replace any inf/nan entries; they creep up when there are near zero
+        # or zero values in xparrayvar
+        objarray[~numpy.isfinite(objarray)] = 1e-100 #zero enough
+
+        return objarray.sum(axis=1)
+
     objout = []
-   
+
     for i in range(len(xspairlist)):
         # create a b-spline of the sim data and fit it to desired range
-        # import code
-        # code.interact(local=locals())
-        
-        #some error checking
-        #print "xspairlist length:", len(xspairlist[i])
-        #print "xspairlist element type:", type(xspairlist[i])
-        #print "xspairlist[i] elements:", xspairlist[i][0], xspairlist[i][1]
-        assert type(xspairlist[i]) is tuple
-        assert len(xspairlist[i]) == 2
-        
         xparrayaxis = xspairlist[i][0]
         simarrayaxis = xspairlist[i][1]
-        
+
         tck = scipy.interpolate.splrep(simarray[0], simarray[simarrayaxis])
         ipsimarray = scipy.interpolate.splev(xparray[0], tck) #xp x-coordinate values to extract from y splines
-        
+
         # we now have x and y axis for the points in the model array
         # calculate the objective function
         #                        1
         # obj(t, params) = -------------(S_sim(t,params)-S_exp(t))^2
         #                  2*sigma_exp^2
-        
+
         diffarray = ipsimarray - xparray[xparrayaxis]
         diffsqarray = diffarray * diffarray
 
@@ -208,27 +290,18 @@ def compare_data(xparray, simarray, xspairlist, vardata=False):
             xparrayvar = xparray[xparrayaxis+1] # variance data provided in xparray in next column
         else:
             # assume a default variance
-            xparrayvar = numpy.ones(xparray.shape[1])
             xparrayvar = xparray[xparrayaxis]*.1 # within 10%? FIXME: check w will about this
             xparrayvar = xparrayvar * xparrayvar
 
         xparrayvar = xparrayvar*2.0
-        numpy.seterr(divide='ignore') # FIXME: added to remove the warnings... use caution!!
         objarray = diffsqarray / xparrayvar
 
-        # check for inf in objarray, they creep up when there are near zero or zero values in xparrayvar
-        for i in range(len(objarray)):
-            if numpy.isinf(objarray[i]) or numpy.isnan(objarray[i]):
-                #print "CORRECTING NAN OR INF. IN ARRAY"
-                # print objarray
-                objarray[i] = 1e-100 #zero enough
-
-        #import code
-        #code.interact(local=locals())
+        # replace any inf/nan entries; they creep up when there are near zero
+        # or zero values in xparrayvar
+        objarray[~numpy.isfinite(objarray)] = 1e-100 #zero enough
 
         objout.append(objarray.sum())
-        #print "OBJOUT(%d,%d):%f  OBJOUT(CUM):%f"%(xparrayaxis, simarrayaxis, objarray.sum(), objout)
-    #print "OBJOUT(total):", objout
+
     return numpy.asarray(objout)
 
 def getgauss(sobolarr, params, standard_devs):
@@ -240,29 +313,11 @@ def getgauss(sobolarr, params, standard_devs):
     # 95% in range SD/2
     """
 
-    sobprmarr = numpy.zeros_like(sobolarr)
-    #ub = numpy.zeros(len(params))
-    #lb = numpy.zeros(len(params))
-
-    from rpy2.robjects import FloatVector
-    from rpy2.robjects.packages import importr
-
-    # use R's qnorm inverse Gaussian transform
-    qnorm = importr('stats').qnorm
-    
-    sobprmarr = [params*numpy.array(qnorm(FloatVector(sv),mean=1,sd=standard_devs)) for sv in sobolarr]
-
-    # set upper/lower bounds for generic problem
-    # for i in range(len(params)):
-    #     if i in useparams:
-    #         ub[i] = params[i] * pow(10,usemag)
-    #         lb[i] = params[i] / pow(10,usemag)
-    #     else:
-    #         ub[i] = params[i] * pow(10, omag)
-    #         lb[i] = params[i] / pow(10, omag)
-    
-    # see  for more info http://en.wikipedia.org/wiki/Exponential_family
-#    sobprmarr = lb*(ub/lb)**sobolarr # map the [0..1] sobol array to values sampled over their omags
+    # inverse standard-normal CDF on the whole array at once; this is the
+    # same qnorm(mean=1, sd=standard_devs) transform that used to be
+    # fetched row by row through the rpy2 bridge to R
+    z = scipy.special.ndtri(numpy.asarray(sobolarr))
+    sobprmarr = numpy.asarray(params) * (1.0 + standard_devs * z)
 
     # sobprmarr is the N x len(params) array for sobol analysis
     return sobprmarr
@@ -274,23 +329,21 @@ def getlog(sobolarr, params, omag=1, useparams=[], usemag=None):
     # omag: order of magnitude over which params should be sampled. this is effectively 3 orders of magnitude when omag=1
     #
 
-    sobprmarr = numpy.zeros_like(sobolarr)
-    ub = numpy.zeros(len(params))
-    lb = numpy.zeros(len(params))
-    # set upper/lower bounds for generic problem
-    for i in range(len(params)):
-        if i in useparams:
-            ub[i] = params[i] * pow(10,usemag)
-            lb[i] = params[i] / pow(10,usemag)
-        else:
-            ub[i] = params[i] * pow(10, omag)
-            lb[i] = params[i] / pow(10, omag)
-    
-    # see  for more info http://en.wikipedia.org/wiki/Exponential_family
-    sobprmarr = lb*(ub/lb)**sobolarr # map the [0..1] sobol array to values sampled over their omags
+    params = numpy.asarray(params)
+    # per-parameter magnitude: usemag for the entries listed in useparams,
+    # omag everywhere else
+    mag = numpy.empty(len(params))
+    mag.fill(omag)
+    if usemag is not None:
+        mag[list(useparams)] = usemag
+    ub = params * 10.0**mag
+    lb = params / 10.0**mag
 
+    # see  for more info http://en.wikipedia.org/wiki/Exponential_family
+    # map the [0..1] sobol array to values sampled over their omags; the
+    # broadcast covers both single rows and N x len(params) arrays
     # sobprmarr is the N x len(params) array for sobol analysis
-    return sobprmarr
+    return lb*(ub/lb)**sobolarr
 
 def getlin(sobolarr, params, CV =.25, useparams=[], useCV=None):
     """ map a set of sobol pseudo-random numbers to a range for parameter evaluation
@@ -304,33 +357,20 @@ def getlin(sobolarr, params, CV =.25, useparams=[], useCV=None):
     CV is the coefficient of variance, CV = sigma/mean
     """
 
-    sobprmarr = numpy.zeros_like(sobolarr)
-
-    ub = numpy.zeros(len(params))
-    lb = numpy.zeros(len(params))
-    # set upper/lower bounds for generic problem
-    for i in range(len(params)):
-        if i in useparams:
-            ub[i] = params[i] + params[i]*useCV
-            lb[i] = params[i] - params[i]*useCV
-        else:
-            ub[i] = params[i] + params[i]*CV
-            lb[i] = params[i] - params[i]*CV
-    
-    # sobprmarr = (sobolarr*(ub-lb)) + lb #map the [0..1] sobol array to the values for integration
-    if len(sobprmarr.shape) == 1:
-        sobprmarr = (sobolarr*(ub-lb)) + lb
-    elif len(sobprmarr.shape) == 2:
-        for i in range(sobprmarr.shape[0]):
-            sobprmarr[i] = (sobolarr[i]*(ub-lb)) + lb
-    else:
-        print "array shape not allowed... "
-        
-
+    params = numpy.asarray(params)
+    # per-parameter coefficient of variance: useCV for the entries listed in
+    # useparams, CV everywhere else
+    cv = numpy.empty(len(params))
+    cv.fill(CV)
+    if useCV is not None:
+        cv[list(useparams)] = useCV
+    ub = params + params*cv
+    lb = params - params*cv
+
+    # map the [0..1] sobol array to the values for integration; the broadcast
+    # covers both single rows and N x len(params) arrays
     # sobprmarr is the N x len(params) array for sobol analysis
-    # lb is the lower bound of params
-    # ub is the upper bound of params
-    return sobprmarr
+    return sobolarr*(ub-lb) + lb
 
 
 def genCmtx(sobmtxA, sobmtxB):
@@ -340,8 +380,12 @@ def genCmtx(sobmtxA, sobmtxB):
 
     nparams = sobmtxA.shape[1] # shape 1 should be the number of params
 
-    # allocate the space for the C matrix
-    sobmtxC = numpy.array([sobmtxB]*nparams) 
+    # allocate the space for the C matrix in one shot; the old
+    # numpy.array([sobmtxB]*nparams) built a transient Python list of
+    # nparams copies first. parmeval can also be passed sobmtxC=None to
+    # skip materializing this tensor entirely.
+    sobmtxC = numpy.empty((nparams,) + sobmtxB.shape)
+    sobmtxC[:] = sobmtxB
 
     # Now we have nparams copies of sobmtxB. replace the i_th column of sobmtxC with the i_th column of sobmtxA
     for i in range(nparams):
@@ -350,83 +394,109 @@ def genCmtx(sobmtxA, sobmtxB):
     return sobmtxC
 
 
-def parmeval(model, sobmtxA, sobmtxB, sobmtxC, time, envlist, xpdata, xspairlist, ic=True, norm=True, vardata=False, useparams = None, fileobj=None):
+# worker state for parallel parmeval runs; set before the Pool is created so
+# the forked children inherit the (unpicklable) envlist closure
+_parmeval_ctx = None
+
+def _parmeval_eval_one(params_row):
+    """Integrate one parameter vector and score it against the experimental
+    data. Reads the shared run context from _parmeval_ctx; returns the
+    compare_data row for this sample."""
+    (model, time, envlist, xpdata, xspairlist, ic, norm, vardata,
+     useparams, regridder) = _parmeval_ctx
+    outlist = odesolve(model, time, envlist, params_row, useparams, ic=ic)
+    if norm:
+        datamax = numpy.max(outlist[0], axis = 1)
+        datamin = numpy.min(outlist[0], axis = 1)
+        outlistnorm = ((outlist[0].T - datamin)/(datamax-datamin)).T
+        # xpdata[0] should be time, get from original array
+        outlistnorm[0] = outlist[0][0].copy()
+        simarray = outlistnorm
+    else:
+        simarray = outlist[0]
+    return compare_data(xpdata, simarray, xspairlist, vardata,
+                        regridder=regridder)
+
+def parmeval(model, sobmtxA, sobmtxB, sobmtxC, time, envlist, xpdata, xspairlist, ic=True, norm=True, vardata=False, useparams = None, fileobj=None, n_jobs=None):
     ''' Function parmeval calculates the yA, yB, and yC_i arrays needed for variance-based global sensitivity analysis
     as prescribed by Saltelli and derived from the work by Sobol.
+
+    The A/B/C sweeps are embarrassingly parallel; pass n_jobs (-1 for all
+    cores) to spread the integrations over a multiprocessing pool.
     '''
-    # 
-    #
+    global _parmeval_ctx
 
     # assign the arrays that will hold yA, yB and yC_n
-    yA = numpy.zeros([sobmtxA.shape[0]] + [len(model.observable_patterns)])
-    yB = numpy.zeros([sobmtxB.shape[0]] + [len(model.observable_patterns)])
-    yC = numpy.zeros(list(sobmtxC.shape[:2]) + [len(model.observable_patterns)]) # matrix is of shape (nparam, nsamples)
-
-    # specify that this is normalized data
-    if norm is True:
+    nobs = len(model.observable_patterns)
+    yA = numpy.zeros([sobmtxA.shape[0]] + [nobs])
+    yB = numpy.zeros([sobmtxB.shape[0]] + [nobs])
+    if sobmtxC is None:
+        # generate the C rows on demand from A and B rather than holding
+        # the full (nparams, nsamples, nparams) tensor in memory
+        c_shape = (sobmtxA.shape[1], sobmtxB.shape[0])
+    else:
+        c_shape = sobmtxC.shape[:2]
+    yC = numpy.zeros(list(c_shape) + [nobs]) # matrix is of shape (nparam, nsamples)
+
+    def c_row(i, j):
+        # row j of B with parameter i taken from row j of A
+        if sobmtxC is not None:
+            return sobmtxC[i][j]
+        row = sobmtxB[j].copy()
+        row[i] = sobmtxA[j, i]
+        return row
+
+    # stash the per-run context where _parmeval_eval_one (and any forked
+    # workers) can see it
+    # the simulation time grid is fixed for the whole sweep, so build the
+    # interpolation weights onto the experimental grid once up front
+    nsteps = envlist[9]
+    regridder = make_regridder(numpy.linspace(0.0, time, nsteps), xpdata[0])
+
+    _parmeval_ctx = (model, time, envlist, xpdata, xspairlist, ic, norm,
+                     vardata, useparams, regridder)
+
+    if n_jobs is not None and n_jobs != 1:
+        # each integration is independent and CPU-bound, so fan the sweeps
+        # out over a process pool; the pool must be created after
+        # _parmeval_ctx is set so the workers inherit it through the fork
+        import multiprocessing
+        pool = multiprocessing.Pool(None if n_jobs == -1 else n_jobs)
+        try:
+            print "processing matrix A, %d iterations:"%(sobmtxA.shape[0])
+            yA[:] = pool.map(_parmeval_eval_one, list(sobmtxA))
+            print "processing matrix B, %d iterations:"%(sobmtxB.shape[0])
+            yB[:] = pool.map(_parmeval_eval_one, list(sobmtxB))
+            print "processing matrix C_n, %d parameters:"%(c_shape[0])
+            rows = [c_row(i, j) for i in range(c_shape[0])
+                                for j in range(c_shape[1])]
+            yC[:] = numpy.reshape(pool.map(_parmeval_eval_one, rows),
+                                  yC.shape)
+        finally:
+            pool.close()
+            pool.join()
+    else:
         # First process the A and B matrices
-        print "processing matrix A, %d iterations:", sobmtxA.shape[0]
+        print "processing matrix A, %d iterations:"%(sobmtxA.shape[0])
         for i in range(sobmtxA.shape[0]):
-            outlist = odesolve(model, time, envlist, sobmtxA[i], useparams, ic)
-            datamax = numpy.max(outlist[0], axis = 1)
-            datamin = numpy.min(outlist[0], axis = 1)
-            outlistnorm = ((outlist[0].T - datamin)/(datamax-datamin)).T
-            outlistnorm[0] = outlist[0][0].copy() # xpdata[0] replace time from original array
-            yA[i] = compare_data(xpdata, outlistnorm, xspairlist, vardata)
+            yA[i] = _parmeval_eval_one(sobmtxA[i])
             spinner(i)
 
-        print "\nprocessing matrix B, %d iterations:", sobmtxB.shape[0]
+        print "\nprocessing matrix B, %d iterations:"%(sobmtxB.shape[0])
         for i in range(sobmtxB.shape[0]):
-            outlist = odesolve(model, time, envlist, sobmtxB[i], useparams, ic)
-            datamax = numpy.max(outlist[0], axis = 1)
-            datamin = numpy.min(outlist[0], axis = 1)
-            outlistnorm = ((outlist[0].T - datamin)/(datamax-datamin)).T
-            # xpdata[0] should be time, get from original array
-            outlistnorm[0] = outlist[0][0].copy()
-            yB[i] = compare_data(xpdata, outlistnorm, xspairlist, vardata)
+            yB[i] = _parmeval_eval_one(sobmtxB[i])
             spinner(i)
 
         # now the C matrix, a bit more complicated b/c it is of size params x samples
-        print "\nprocessing matrix C_n, %d parameters:"%(sobmtxC.shape[0])
-        for i in range(sobmtxC.shape[0]):
-            print "\nprocessing processing parameter %d, %d iterations"%(i,sobmtxC.shape[1])
-            for j in range(sobmtxC.shape[1]):
-                outlist = odesolve(model, time, envlist, sobmtxC[i][j], useparams, ic)
-                datamax = numpy.max(outlist[0], axis = 1)
-                datamin = numpy.min(outlist[0], axis = 1)
-                outlistnorm = ((outlist[0].T - datamin)/(datamax-datamin)).T
-                # xpdata[0] should be time, get from original array
-                outlistnorm[0] = outlist[0][0].copy()
-                yC[i][j] = compare_data(xpdata, outlistnorm, xspairlist, vardata)
+        print "\nprocessing matrix C_n, %d parameters:"%(c_shape[0])
+        for i in range(c_shape[0]):
+            print "\nprocessing processing parameter %d, %d iterations"%(i,c_shape[1])
+            for j in range(c_shape[1]):
+                yC[i][j] = _parmeval_eval_one(c_row(i, j))
                 spinner(j)
-    else:
-        # First process the A and B matrices
-        print "processing matrix A:"
-        for i in range(sobmtxA.shape[0]):
-            outlist = odesolve(model, time, envlist, sobmtxA[i], useparams, ic)
-            yA[i] = compare_data(xpdata, outlist[0], xspairlist, vardata)
-            spinner(i)
 
-        print "processing matrix B:"
-        for i in range(sobmtxB.shape[0]):
-            outlist = odesolve(model, time, envlist, sobmtxB[i], useparams, ic)
-            yB[i] = compare_data(xpdata, outlistnorm, xspairlist, vardata)
-            spinner(i)
+    _parmeval_ctx = None
 
-        print "processing matrix C_n"
-        for i in range(sobmtxC.shape[0]):
-            print "processing processing parameter %d"%i
-            for j in range(sobmtxC.shape[1]):
-                outlist = odesolve(model, time, envlist, sobmtxC[i][j], useparams, ic)
-                yC[i][j] = compare_data(xpdata, outlistnorm, xspairlist, vardata)
-                spinner(j)
-
-    if fileobj:
-        if norm:
-            writetofile(fileobj, params, outlistnorm, objout)
-        else:
-            writetofile(fileobj, params, outlist, objout)
-    
     return yA, yB, yC
 
 def getvarsens(yA, yB, yC):
@@ -471,14 +541,13 @@ def getvarsens(yA, yB, yC):
     E_s  = numpy.average((yA * yB), axis=0)
     E_st = numpy.average(yB, axis=0) ** 2
 
-    #allocate the S_i and ST_i arrays
-    Sens = numpy.zeros((nparms,nobs))
-    SensT = numpy.zeros((nparms,nobs))
+    # get the U_j and U_-j values for all parameters in one contraction
+    # over the sample axis instead of a per-parameter Python loop
+    UA = numpy.einsum('so,pso->po', yA, yC) / (nsamples - 1.)
+    UB = numpy.einsum('so,pso->po', yB, yC) / (nsamples - 1.)
 
-    # now get the U_j and U_-j values and store them 
-    for i in range(nparms):
-        Sens[i]  =        (((yA * yC[i]).sum(axis=0)/(nsamples-1.)) - E_s ) / varyA
-        SensT[i] = 1.0 - ((((yB * yC[i]).sum(axis=0)/(nsamples-1.)) - E_st) / varyB)
+    Sens  =        (UA - E_s ) / varyA
+    SensT = 1.0 - ((UB - E_st) / varyB)
 
     return Sens, SensT
         
@@ -568,19 +637,13 @@ def sample_vary_all(model,n,knockouts=3,tfinal=30000,nsteps=1000):
     # and multiply them
     sobvals_scaled = getgauss(sobvals,params.values(),0.125)
     
-#    finalquants = numpy.zeros((n,len(model.observables)))
     t = numpy.linspace(0,tfinal,nsteps)
 
-    # open files
-    pfile = open('params.csv','wb')
-    ofile = open('observations.csv','wb')
-
-    # write headers
-    import csv
-    pcsv = csv.writer(pfile)
-    ocsv = csv.writer(ofile)
-    pcsv.writerow(params.keys())
-    ocsv.writerow(model.observables.keys())
+    # accumulate the sampled parameters and final-step observables in
+    # preallocated arrays and write each file once at the end, instead of
+    # interleaving per-row csv writes with the integrations
+    all_params = numpy.empty((n, numparam))
+    all_obs = numpy.empty((n, len(model.observables)))
 
     for i in range(n):
         # set parameters
@@ -592,16 +655,15 @@ def sample_vary_all(model,n,knockouts=3,tfinal=30000,nsteps=1000):
         for k in knockout_params:
             params[k] = 0
         model = set_parameters(model, params)
-        pcsv.writerow(params.values())
+        all_params[i] = params.values()
         # sample from model
         yout = integrate.odesolve(model, t)
-        ocsv.writerow([yout[k][nsteps - 1] for k in model.observables.keys()])
-#        finalquants[i] = [yout[k][nsteps - 1] for k in model.observables.keys()]
-
-    pfile.close()
-    ofile.close()
+        all_obs[i] = [yout[k][nsteps - 1] for k in model.observables.keys()]
 
-#    return finalquants
+    numpy.savetxt('params.csv', all_params, delimiter=',',
+                  header=','.join(params.keys()), comments='')
+    numpy.savetxt('observations.csv', all_obs, delimiter=',',
+                  header=','.join(model.observables.keys()), comments='')
 
 if __name__ == "__main__":
      model = simple_egfr.model
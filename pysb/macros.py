@@ -37,10 +37,11 @@ pattern, which can be harder for the caller to debug.
 import inspect
 from pysb import *
 import pysb.core
-from pysb.core import ComponentSet, as_reaction_pattern, as_complex_pattern
+from pysb.core import ComponentSet, as_reaction_pattern, \
+    as_complex_pattern, ComplexPattern, ReactionPattern, RuleExpression
 import numbers
-import functools
 import itertools
+import weakref
 
 __all__ = ['equilibrate',
            'bind', 'bind_table',
@@ -52,31 +53,109 @@ __all__ = ['equilibrate',
 # Internal helper functions
 # =========================
 
+# Cache of pattern labels keyed by pattern object id. Patterns are
+# immutable for our purposes so each unique object only needs to be
+# labelled once, e.g. when the same species appears in many rules built
+# by a table macro. The cache is cleared on entry to _macro_rule and
+# bind_table so ids of dead objects can never alias new ones.
+_label_cache = {}
+
+# Site condition values that should not appear in a pattern label: unbound
+# (None), bonds and bond lists, and (state, bond) tuples. Spelled with
+# concrete types because an abstract-base-class test like numbers.Real is
+# several times slower per value on this hot path.
+_label_excluded_types = (type(None), list, tuple, int, long, float)
+
+# Concrete numeric types accepted as rate constants; tested before falling
+# back to numbers.Real for the same reason as above.
+_real_types = (int, long, float)
+
+# Standard suffix pair for forward/reverse rate parameters, shared by the
+# reversible macros so the pair is not rebuilt on every call.
+_KF_KR = ('kf', 'kr')
+
+# Per-monomer frozensets of site names for O(1) membership tests in
+# _verify_sites. Weakly keyed so discarded monomers do not accumulate.
+_site_cache = weakref.WeakKeyDictionary()
+
+def _species_pattern(species):
+    """Normalize a Monomer, MonomerPattern or ComplexPattern to a
+    ComplexPattern."""
+    # check ComplexPattern first so already-normalized species skip the
+    # Monomer test and the as_complex_pattern call entirely
+    if isinstance(species, ComplexPattern):
+        return species
+    if isinstance(species, Monomer):
+        species = species()
+    return as_complex_pattern(species)
+
+def _monomer_of(x):
+    """Return the Monomer underlying a Monomer or MonomerPattern."""
+    return getattr(x, 'monomer', x)
+
 def _complex_pattern_label(cp):
     """Return a string label for a ComplexPattern."""
-    mp_labels = [_monomer_pattern_label(mp) for mp in cp.monomer_patterns]
-    return ''.join(mp_labels)
+    label = _label_cache.get(id(cp))
+    if label is None:
+        mps = cp.monomer_patterns
+        if len(mps) == 1:
+            # common unary case: no intermediate list or join needed
+            label = _monomer_pattern_label(mps[0])
+        else:
+            label = intern(''.join([_monomer_pattern_label(mp)
+                                    for mp in mps]))
+        _label_cache[id(cp)] = label
+    return label
 
 def _monomer_pattern_label(mp):
     """Return a string label for a MonomerPattern."""
-    site_values = [str(x) for x in mp.site_conditions.values()
-                            if x is not None
-                            and not isinstance(x, list)
-                            and not isinstance(x, tuple)
-                            and not isinstance(x, numbers.Real)]
-    return mp.monomer.name + ''.join(site_values)
+    label = _label_cache.get(id(mp))
+    if label is None:
+        site_values = [str(x) for x in mp.site_conditions.itervalues()
+                                if not isinstance(x, _label_excluded_types)
+                                and not isinstance(x, numbers.Real)]
+        # intern the label so the many rule/parameter names derived from
+        # it share one string object and its cached hash
+        label = intern(mp.monomer.name + ''.join(site_values))
+        _label_cache[id(mp)] = label
+    return label
 
 def _rule_name_generic(rule_expression):
     """Return a generic string label for a RuleExpression."""
     # Get ReactionPatterns
-    react_p = rule_expression.reactant_pattern
-    prod_p = rule_expression.product_pattern
+    react_cps = rule_expression.reactant_pattern.complex_patterns
+    prod_cps = rule_expression.product_pattern.complex_patterns
+    # Build the label components, skipping the join for one-complex sides
+    if len(react_cps) == 1:
+        lhs_label = _complex_pattern_label(react_cps[0])
+    else:
+        lhs_label = '_'.join([_complex_pattern_label(cp)
+                              for cp in react_cps])
+    if len(prod_cps) == 1:
+        rhs_label = _complex_pattern_label(prod_cps[0])
+    else:
+        rhs_label = '_'.join([_complex_pattern_label(cp)
+                              for cp in prod_cps])
+    # two-operand str concatenation skips the format-string parser
+    return lhs_label + '_to_' + rhs_label
+
+def _synthesize_name_func(rule_expression):
+    """Return a product-based string label for a synthesis RuleExpression."""
+    cps = rule_expression.product_pattern.complex_patterns
+    return '_'.join(_complex_pattern_label(cp) for cp in cps)
+
+def _degrade_name_func(rule_expression):
+    """Return a reactant-based string label for a degradation
+    RuleExpression."""
+    cps = rule_expression.reactant_pattern.complex_patterns
+    return '_'.join(_complex_pattern_label(cp) for cp in cps)
+
+def _bind_name_func(rule_expression):
+    """Return a reactant-based string label for a binding RuleExpression."""
+    # Get ComplexPatterns
+    react_cps = rule_expression.reactant_pattern.complex_patterns
     # Build the label components
-    lhs_label = [_complex_pattern_label(cp) for cp in react_p.complex_patterns]
-    lhs_label = '_'.join(lhs_label)
-    rhs_label = [_complex_pattern_label(cp) for cp in prod_p.complex_patterns]
-    rhs_label = '_'.join(rhs_label)
-    return '%s_to_%s' % (lhs_label, rhs_label)
+    return '_'.join(_complex_pattern_label(cp) for cp in react_cps)
 
 def _macro_rule(rule_prefix, rule_expression, klist, ksuffixes,
                 name_func=_rule_name_generic):
@@ -148,7 +227,8 @@ def _macro_rule(rule_prefix, rule_expression, klist, ksuffixes,
 
     """
 
-    r_name = '%s_%s' % (rule_prefix, name_func(rule_expression))
+    _label_cache.clear()
+    r_name = rule_prefix + '_' + name_func(rule_expression)
 
     # If rule is unidirectional, make sure we only have one parameter
     if (not rule_expression.is_reversible):
@@ -159,19 +239,30 @@ def _macro_rule(rule_prefix, rule_expression, klist, ksuffixes,
         if len(klist) != 2 or len(ksuffixes) != 2:
             raise ValueError("A bidirectional rule must have two parameters.")
 
-    if all(isinstance(x, Parameter) for x in klist):
+    # Dispatch on the type of the first rate rather than scanning klist with
+    # two all(isinstance(...)) generator expressions; lengths were validated
+    # above, so only the second element (if any) still needs checking.
+    if isinstance(klist[0], Parameter):
         k1 = klist[0]
         if rule_expression.is_reversible:
+            if not isinstance(klist[1], Parameter):
+                raise ValueError("klist must contain Parameter objects or "
+                                 "numbers.")
             k2 = klist[1]
-        params_created = ComponentSet()
+        params_created = ()
     # if klist is numbers, generate the Parameters
-    elif all(isinstance(x, numbers.Real) for x in klist):
-        k1 = Parameter('%s_%s' % (r_name, ksuffixes[0]), klist[0])
-        params_created = ComponentSet([k1]) 
+    elif isinstance(klist[0], _real_types) or isinstance(klist[0],
+                                                         numbers.Real):
+        if rule_expression.is_reversible and \
+                not (isinstance(klist[1], _real_types)
+                     or isinstance(klist[1], numbers.Real)):
+            raise ValueError("klist must contain Parameter objects or "
+                             "numbers.")
+        k1 = Parameter(r_name + '_' + ksuffixes[0], klist[0])
+        params_created = [k1]
         if rule_expression.is_reversible:
-            k2 = Parameter('%s_%s' % (r_name, ksuffixes[1]),
-                           klist[1])
-            params_created.add(k2)
+            k2 = Parameter(r_name + '_' + ksuffixes[1], klist[1])
+            params_created.append(k2)
     else:
         raise ValueError("klist must contain Parameter objects or numbers.")
 
@@ -180,8 +271,12 @@ def _macro_rule(rule_prefix, rule_expression, klist, ksuffixes,
     else:
         r = Rule(r_name, rule_expression, k1)
 
-    # Build a set of components that were created
-    return ComponentSet([r]) | params_created
+    # Build a single set of the components that were created; a union of
+    # two throwaway sets here would allocate three containers per rule
+    components = ComponentSet([r])
+    for param in params_created:
+        components.add(param)
+    return components
 
 def _verify_sites(m, *site_list):
     """
@@ -205,10 +300,108 @@ def _verify_sites(m, *site_list):
 
     """
 
+    mono = _monomer_of(m)
+    sites = _site_cache.get(mono)
+    if sites is None:
+        sites = frozenset(mono.sites)
+        _site_cache[mono] = sites
     for site in site_list:
-        if site not in m().monomer.sites:
+        if site not in sites:
             raise ValueError("Monomer '%s' must contain the site '%s'" %
-                            (m().monomer.name, site))
+                            (mono.name, site))
+    return True
+
+# Sites already proven present, per monomer. Weakly keyed like _site_cache.
+_verified_sites_cache = weakref.WeakKeyDictionary()
+
+# Free-site patterns built by _free_site_pattern, keyed weakly by monomer and
+# then by (site, original site conditions).
+_free_pattern_cache = weakref.WeakKeyDictionary()
+
+def _free_site_pattern(species, site):
+    """Return `species` with `site` explicitly unbound.
+
+    The result is cached per monomer and site conditions, so enzyme-centric
+    models that call catalyze with the same enzyme many times reuse one
+    pattern object instead of rebuilding it for every rule. Patterns are
+    never mutated after construction, which makes the sharing safe. Falls
+    back to a plain build if the conditions are not hashable.
+    """
+    mono = _monomer_of(species)
+    if species is mono:
+        key = (site, (), None)
+    else:
+        try:
+            key = (site, tuple(sorted(species.site_conditions.items())),
+                   species.compartment)
+            hash(key)
+        except TypeError:
+            return species({site: None})
+    per_mono = _free_pattern_cache.get(mono)
+    if per_mono is None:
+        per_mono = {}
+        _free_pattern_cache[mono] = per_mono
+    pattern = per_mono.get(key)
+    if pattern is None:
+        pattern = species({site: None})
+        per_mono[key] = pattern
+    return pattern
+
+def _pattern_key(species, mono):
+    """Return a hashable cache key describing a species pattern, or raise
+    TypeError if its site conditions are not hashable."""
+    if species is mono:
+        return ()
+    key = (tuple(sorted(species.site_conditions.items())),
+           species.compartment)
+    hash(key)
+    return key
+
+# Enzyme:substrate complexes built by _es_complex_pattern, keyed weakly by
+# the enzyme monomer.
+_es_complex_cache = weakref.WeakKeyDictionary()
+
+def _es_complex_pattern(enzyme, e_site, substrate, s_site, s_state):
+    """Return the bound enzyme:substrate ComplexPattern for _catalyze.
+
+    Cached on the same terms as _free_site_pattern so one enzyme paired
+    with the same substrate shape reuses a single complex.
+    """
+    e_mono = _monomer_of(enzyme)
+    s_mono = _monomer_of(substrate)
+    try:
+        key = (e_site, _pattern_key(enzyme, e_mono), s_mono, s_site,
+               s_state, _pattern_key(substrate, s_mono))
+        hash(key)
+    except TypeError:
+        return enzyme({e_site: 1}) % substrate({s_site: s_state})
+    per_enzyme = _es_complex_cache.get(e_mono)
+    if per_enzyme is None:
+        per_enzyme = {}
+        _es_complex_cache[e_mono] = per_enzyme
+    pattern = per_enzyme.get(key)
+    if pattern is None:
+        pattern = enzyme({e_site: 1}) % substrate({s_site: s_state})
+        per_enzyme[key] = pattern
+    return pattern
+
+def _verify_sites_cached(m, *site_list):
+    """Like _verify_sites, but memoize successful checks per monomer.
+
+    Macros that are typically driven from tables (e.g. catalyze with one
+    enzyme against many substrates) re-verify the same sites over and over;
+    after the first success the check can be skipped outright.
+    """
+
+    mono = _monomer_of(m)
+    verified = _verified_sites_cache.get(mono)
+    if verified is None:
+        verified = set()
+        _verified_sites_cache[mono] = verified
+    for site in site_list:
+        if site not in verified:
+            _verify_sites(mono, site)
+            verified.add(site)
     return True
 
 # Unimolecular patterns
@@ -266,7 +459,7 @@ def equilibrate(s1, s2, klist):
     """
     
     # turn any Monomers into MonomerPatterns
-    return _macro_rule('equilibrate', s1 <> s2, klist, ['kf', 'kr'])
+    return _macro_rule('equilibrate', s1 <> s2, klist, _KF_KR)
 
 # Binding
 # =======
@@ -326,16 +519,19 @@ def bind(s1, site1, s2, site2, klist):
     _verify_sites(s1, site1)
     _verify_sites(s2, site2)
 
-    def bind_name_func(rule_expression):
-        # Get ComplexPatterns
-        react_cps = rule_expression.reactant_pattern.complex_patterns
-        # Build the label components
-        return '_'.join(_complex_pattern_label(cp) for cp in react_cps)
+    return _bind(s1, site1, s2, site2, klist)
+
+def _bind(s1, site1, s2, site2, klist):
+    """Create the binding rule for `bind` without re-verifying sites.
+
+    bind_table verifies each row and column species once up front, then
+    calls this directly so verification is not repeated for every cell.
+    """
 
     return _macro_rule('bind',
                        s1({site1: None}) + s2({site2: None}) <>
                        s1({site1: 1}) % s2({site2: 1}),
-                       klist, ['kf', 'kr'], name_func=bind_name_func)
+                       klist, _KF_KR, name_func=_bind_name_func)
 
 def bind_table(bindtable, row_site, col_site, kf=None):
     """
@@ -441,27 +637,48 @@ def bind_table(bindtable, row_site, col_site, kf=None):
 
     """
 
+    _label_cache.clear()
+
     # extract species lists and matrix of rates
     s_rows = [row[0] for row in bindtable[1:]]
     s_cols = bindtable[0]
     kmatrix = [row[1:] for row in bindtable[1:]]
 
-    # ensure kf is passed when necessary
-    kiter = itertools.chain.from_iterable(kmatrix)
-    if any(isinstance(x, numbers.Real) for x in kiter) and kf is None:
-        raise ValueError("must specify kf when using single kd values")
+    # ensure kf is passed when necessary; the scan is skipped entirely when
+    # kf was given and stops at the first scalar cell otherwise
+    if kf is None:
+        for row in kmatrix:
+            for x in row:
+                if isinstance(x, _real_types) or isinstance(x, numbers.Real):
+                    raise ValueError("must specify kf when using single kd "
+                                     "values")
+
+    # build each row/column species pattern once, not once per table cell;
+    # bind copies the patterns it is given, so sharing them across cells is
+    # safe
+    row_patterns = [s() for s in s_rows]
+    col_patterns = [s() for s in s_cols]
+
+    # verify each species' binding site once, not once per cell
+    for pattern in row_patterns:
+        _verify_sites(pattern, row_site)
+    for pattern in col_patterns:
+        _verify_sites(pattern, col_site)
 
     # loop over interactions
     components = ComponentSet()
-    for r, s_row in enumerate(s_rows):
-        for c, s_col in enumerate(s_cols):
+    for r, row_pattern in enumerate(row_patterns):
+        for c, col_pattern in enumerate(col_patterns):
             klist = kmatrix[r][c]
             if klist is not None:
                 # if user gave a single kd, calculate kr
                 if isinstance(klist, numbers.Real):
                     kd = klist
                     klist = (kf, kd*kf)
-                components |= bind(s_row(), row_site, s_col(), col_site, klist)
+                # update in place; |= would build a brand new ComponentSet
+                # for every cell
+                components.update(_bind(row_pattern, row_site, col_pattern,
+                                        col_site, klist))
 
     return components
 
@@ -571,34 +788,56 @@ def catalyze(enzyme, e_site, substrate, s_site, product, klist):
 
     """
 
-    _verify_sites(enzyme, e_site)
-    _verify_sites(substrate, s_site)
+    _verify_sites_cached(enzyme, e_site)
+    _verify_sites_cached(substrate, s_site)
+
+    return _catalyze(enzyme, e_site, substrate, s_site, product, klist,
+                     _monomer_of(product) is _monomer_of(substrate))
+
+def _catalyze(enzyme, e_site, substrate, s_site, product, klist,
+              same_monomer):
+    """Create the rules for `catalyze` without re-verifying sites.
+
+    `same_monomer` says whether product is a variant of substrate;
+    catalyze_state knows this by construction and passes it directly.
+    """
 
     # Set up some aliases to the patterns we'll use in the rules
-    enzyme_free = enzyme({e_site: None})
+    enzyme_free = _free_site_pattern(enzyme, e_site)
     # retain any existing state for substrate's s_site, otherwise set it to None
     if s_site in substrate.site_conditions:
         substrate_free = substrate()
         s_state = (substrate.site_conditions[s_site], 1)
     else:
-        substrate_free = substrate({s_site: None})
+        substrate_free = _free_site_pattern(substrate, s_site)
         s_state = 1
-    es_complex = enzyme({e_site: 1}) % substrate({s_site: s_state})
+    es_complex = _es_complex_pattern(enzyme, e_site, substrate, s_site,
+                                     s_state)
 
     # If product is actually a variant of substrate, we need to explicitly say
     # that it is no longer bound to enzyme, unless product already specifies a
     # state for s_site.
-    if product().monomer is substrate().monomer \
-            and s_site not in product.site_conditions:
+    if same_monomer and s_site not in product.site_conditions:
         product = product({s_site: None})
 
-    # create the rules
-    components = _macro_rule('bind',
-                             enzyme_free + substrate_free <> es_complex,
-                             klist[0:2], ['kf', 'kr'])
-    components |= _macro_rule('catalyze',
-                              es_complex >> enzyme_free + product,
-                              [klist[2]], ['kc'])
+    # unpack the rates once instead of slicing and indexing klist
+    if len(klist) != 3:
+        raise ValueError("klist must contain forward, reverse and catalytic "
+                         "rate constants")
+    kf, kr, kc = klist
+
+    # create the rules; the rule expressions are assembled directly
+    # rather than through the +/<>/>> operator overloads, whose type
+    # dispatch costs several method calls per expression
+    enzyme_free_cp = as_complex_pattern(enzyme_free)
+    bind_expr = RuleExpression(
+        ReactionPattern([enzyme_free_cp, as_complex_pattern(substrate_free)]),
+        ReactionPattern([es_complex]), True)
+    catalyze_expr = RuleExpression(
+        ReactionPattern([es_complex]),
+        ReactionPattern([enzyme_free_cp, as_complex_pattern(product)]), False)
+    components = _macro_rule('bind', bind_expr, [kf, kr], _KF_KR)
+    components.update(_macro_rule('catalyze', catalyze_expr, [kc], ['kc']))
 
     return components
 
@@ -686,8 +925,13 @@ def catalyze_state(enzyme, e_site, substrate, s_site, mod_site,
 
     """
 
-    return catalyze(enzyme, e_site, substrate({mod_site: state1}),
-                    s_site, substrate({mod_site: state2}), klist)
+    _verify_sites_cached(enzyme, e_site)
+    _verify_sites_cached(substrate, s_site)
+
+    # product shares substrate's monomer by construction, so tell _catalyze
+    # rather than have it rediscover that per call
+    return _catalyze(enzyme, e_site, substrate({mod_site: state1}),
+                     s_site, substrate({mod_site: state2}), klist, True)
 
 def catalyze_one_step(enzyme, substrate, product, kf):
     """
@@ -831,8 +1075,8 @@ def catalyze_one_step_reversible(enzyme, substrate, product, klist):
 
     components = catalyze_one_step(enzyme, substrate, product, klist[0])
 
-    components |= _macro_rule('reverse', product() >> substrate(),
-                              [klist[1]], ['kr'])
+    components.update(_macro_rule('reverse', product() >> substrate(),
+                                  [klist[1]], ['kr']))
     return components
 
 # Synthesis and degradation
@@ -889,18 +1133,21 @@ def synthesize(species, ksynth):
 
     """
 
-    def synthesize_name_func(rule_expression):
-        cps = rule_expression.product_pattern.complex_patterns
-        return '_'.join(_complex_pattern_label(cp) for cp in cps)
+    return _synthesize(_species_pattern(species), ksynth)
 
-    if isinstance(species, Monomer):
-        species = species()
-    species = as_complex_pattern(species)
-    if not species.is_concrete():
+def _synthesize(species, ksynth, _check_concrete=True):
+    """Create the synthesis rule for `synthesize`, given a ComplexPattern.
+
+    _check_concrete may be passed as False when the caller has already
+    established concreteness for this species, as is_concrete walks every
+    site of every monomer pattern.
+    """
+
+    if _check_concrete and not species.is_concrete():
         raise ValueError("species must be concrete")
 
     return _macro_rule('synthesize', None >> species, [ksynth], ['k'],
-                       name_func=synthesize_name_func)
+                       name_func=_synthesize_name_func)
 
 def degrade(species, kdeg):
     """
@@ -951,16 +1198,13 @@ def degrade(species, kdeg):
 
     """
 
-    def degrade_name_func(rule_expression):
-        cps = rule_expression.reactant_pattern.complex_patterns
-        return '_'.join(_complex_pattern_label(cp) for cp in cps)
+    return _degrade(_species_pattern(species), kdeg)
 
-    if isinstance(species, Monomer):
-        species = species()
-    species = as_complex_pattern(species)
+def _degrade(species, kdeg):
+    """Create the degradation rule for `degrade`, given a ComplexPattern."""
 
     return _macro_rule('degrade', species >> None, [kdeg], ['k'],
-                       name_func=degrade_name_func)
+                       name_func=_degrade_name_func)
 
 def synthesize_degrade_table(table):
     """
@@ -1034,20 +1278,83 @@ def synthesize_degrade_table(table):
 
     """
 
-    # loop over interactions
+    # loop over interactions; bind the loop-invariant callables to locals
+    # so each row pays LOAD_FAST instead of global and attribute lookups
     components = ComponentSet()
-    for row in table:
-        species, ksynth, kdeg = row
+    update = components.update
+    species_pattern = _species_pattern
+    synthesize_rule = _synthesize
+    degrade_rule = _degrade
+    checked_concrete = set()
+    for species, ksynth, kdeg in table:
+        if ksynth is None and kdeg is None:
+            continue
+        # normalize the species once per row, not once per macro call
+        species_cp = species_pattern(species)
         if ksynth is not None:
-            components |= synthesize(species, ksynth)
+            # check each distinct species object for concreteness only the
+            # first time it is synthesized; the rows keep them alive, so
+            # ids cannot be recycled mid-table
+            update(synthesize_rule(
+                species_cp, ksynth,
+                _check_concrete=id(species) not in checked_concrete))
+            checked_concrete.add(id(species))
         if kdeg is not None:
-            components |= degrade(species, kdeg)
+            update(degrade_rule(species_cp, kdeg))
 
     return components
 
 # Pore assembly
 # =============
 
+# Assembled pore ComplexPatterns, keyed weakly by the subunit monomer and then
+# by (site1, site2, size, subunit pattern conditions).
+_pore_species_cache = weakref.WeakKeyDictionary()
+
+# Preallocated pool of ring bond numbers. CPython only caches small ints up
+# to 256, so rings bigger than that would otherwise allocate fresh int
+# objects for every bond on every build.
+_BOND_INTS = range(1, 1025)
+
+def _pore_ring(subunit, site1, site2, size):
+    """Build the closed ring ComplexPattern for pore_species (size >= 3)."""
+    # build all the subunit patterns in one pass and wrap them in a single
+    # ComplexPattern, rather than growing one with %= (which copies the
+    # pattern list at every step). Subunit i carries bond i on site1 and the
+    # next bond (wrapping around to 1) on site2; generating both sequences up
+    # front keeps the per-subunit wraparound arithmetic out of the loop.
+    # Stamp each subunit out of one prototype pattern and write the two ring
+    # bonds directly, so the subunit's other site conditions are parsed once
+    # instead of once per ring position (the sites were verified by our
+    # caller, pore_species).
+    prototype = subunit()
+    if size == 3:
+        # straight-line build for the dominant biological pore size, skipping
+        # the bond-sequence and loop machinery below
+        mp1 = prototype()
+        mp2 = prototype()
+        mp3 = prototype()
+        mp1.site_conditions[site1] = 1
+        mp1.site_conditions[site2] = 2
+        mp2.site_conditions[site1] = 2
+        mp2.site_conditions[site2] = 3
+        mp3.site_conditions[site1] = 3
+        mp3.site_conditions[site2] = 1
+        return ComplexPattern([mp1, mp2, mp3], None, match_once=True)
+    if size <= len(_BOND_INTS):
+        bonds1 = _BOND_INTS[:size]
+        bonds2 = _BOND_INTS[1:size] + _BOND_INTS[:1]
+    else:
+        bonds1 = range(1, size + 1)
+        bonds2 = range(2, size + 1) + [1]
+    mps = []
+    for b1, b2 in zip(bonds1, bonds2):
+        mp = prototype()
+        mp.site_conditions[site1] = b1
+        mp.site_conditions[site2] = b2
+        mps.append(mp)
+    return ComplexPattern(mps, None, match_once=True)
+
 def pore_species(subunit, site1, site2, size):
     """
     Return a MonomerPattern representing a circular homomeric pore.
@@ -1090,22 +1397,51 @@ def pore_species(subunit, site1, site2, size):
 
     """
 
-    _verify_sites(subunit, site1, site2)
+    _verify_sites_cached(subunit, site1, site2)
     if size <= 0:
         raise ValueError("size must be an integer greater than 0")
+    # the assembly macros below rebuild the same species O(max_size) times,
+    # so cache each one per subunit and hand out copies; callers are free to
+    # mutate their copy (pore_transport and pore_bind do). Caching all sizes
+    # also means the site-condition dicts for the small species are built
+    # once per subunit instead of on every call.
+    mono = _monomer_of(subunit)
+    try:
+        key = (site1, site2, size, _pattern_key(subunit, mono))
+    except TypeError:
+        key = per_mono = None
+    else:
+        per_mono = _pore_species_cache.get(mono)
+        if per_mono is None:
+            per_mono = {}
+            _pore_species_cache[mono] = per_mono
+        pore = per_mono.get(key)
+        if pore is not None:
+            return pore.copy() if isinstance(pore, ComplexPattern) else pore()
     if size == 1:
         pore = subunit({site1: None, site2: None})
     elif size == 2:
         pore = subunit({site1: 1, site2: None}) % \
                subunit({site1: None, site2: 1})
     else:
-        # build up a ComplexPattern, starting with a single subunit
-        pore = subunit({site1: 1, site2: 2})
-        for i in range(2, size + 1):
-            pore %= subunit({site1: i, site2: i % size + 1})
-        pore.match_once = True
+        pore = _pore_ring(subunit, site1, site2, size)
+    if key is not None:
+        per_mono[key] = pore
+        return pore.copy() if isinstance(pore, ComplexPattern) else pore()
     return pore
 
+def _pore_bound_pattern(pore_free, sc_site, bond_num):
+    """Return `pore_free` with its first subunit bound through `sc_site`.
+
+    Only the first monomer pattern is copied; the remaining ring subunits
+    are shared with `pore_free`, which is never mutated after construction,
+    so a full ring copy is unnecessary.
+    """
+    first = pore_free.monomer_patterns[0]()
+    first.site_conditions[sc_site] = bond_num
+    return ComplexPattern([first] + pore_free.monomer_patterns[1:],
+                          pore_free.compartment, pore_free.match_once)
+
 def assemble_pore_sequential(subunit, site1, site2, max_size, ktable):
     """
     Generate rules to assemble a circular homomeric pore sequentially.
@@ -1180,22 +1516,34 @@ def assemble_pore_sequential(subunit, site1, site2, max_size, ktable):
 
     if len(ktable) != max_size - 1:
         raise ValueError("len(ktable) must be equal to max_size - 1")
+    # check the inner lists up front so a mis-shaped table fails before any
+    # rules or parameters from the earlier assembly steps are created
+    if any(len(klist) != 2 for klist in ktable):
+        raise ValueError("each element of ktable must contain two rate "
+                         "constants")
 
     def pore_rule_name(rule_expression, size):
         react_p = rule_expression.reactant_pattern
         monomer = react_p.complex_patterns[0].monomer_patterns[0].monomer
-        return '%s_%d' % (monomer.name, size)
+        # plain concatenation beats %-formatting on this hot path
+        return monomer.name + '_' + str(size)
 
     components = ComponentSet()
     s = pore_species(subunit, site1, site2, 1)
-    for size, klist in zip(range(2, max_size + 1), ktable):
-        pore_prev = pore_species(subunit, site1, site2, size - 1)
+    # each iteration's product is the next iteration's reactant, so carry it
+    # over rather than building every intermediate pore twice
+    pore_prev = s
+    for size, klist in enumerate(ktable, start=2):
         pore_next = pore_species(subunit, site1, site2, size)
-        name_func = functools.partial(pore_rule_name, size=size)
-        components |= _macro_rule('assemble_pore_sequential',
-                                  s + pore_prev <> pore_next,
-                                  klist, ['kf', 'kr'],
-                                  name_func=name_func)
+        # default-argument capture avoids a functools.partial wrapper (and
+        # its keyword dict merge) on every name_func call
+        name_func = lambda rule_expression, size=size: \
+            pore_rule_name(rule_expression, size)
+        components.update(_macro_rule('assemble_pore_sequential',
+                                      s + pore_prev <> pore_next,
+                                      klist, ['kf', 'kr'],
+                                      name_func=name_func))
+        pore_prev = pore_next
 
     return components
 
@@ -1299,27 +1647,16 @@ def pore_transport(subunit, sp_site1, sp_site2, sc_site, min_size, max_size,
 
     """
 
-    _verify_sites(subunit, sc_site)
-    _verify_sites(csource, c_site)
+    _verify_sites_cached(subunit, sc_site)
+    _verify_sites_cached(csource, c_site)
 
     if len(ktable) != max_size - min_size + 1:
         raise ValueError("len(ktable) must be equal to max_size - min_size + 1")
-
-    def pore_transport_rule_name(rule_expression, size):
-        # Get ReactionPatterns
-        react_p = rule_expression.reactant_pattern
-        prod_p = rule_expression.product_pattern
-        # Build the label components
-        # Pore is always first complex of LHS due to how we build the rules
-        subunit = react_p.complex_patterns[0].monomer_patterns[0]
-        if len(react_p.complex_patterns) == 2:
-            # This is the complexation reaction
-            cargo = react_p.complex_patterns[1].monomer_patterns[0]
-        else:
-            # This is the dissociation reaction
-            cargo = prod_p.complex_patterns[1].monomer_patterns[0]
-        return '%s_%d_%s' % (_monomer_pattern_label(subunit), size,
-                             _monomer_pattern_label(cargo))
+    # check the inner lists up front so a mis-shaped table fails before any
+    # rules or parameters from the earlier sizes are created
+    if any(len(klist) != 3 for klist in ktable):
+        raise ValueError("each element of ktable must contain three rate "
+                         "constants")
 
     components = ComponentSet()
     # Set up some aliases that are invariant with pore size
@@ -1330,7 +1667,18 @@ def pore_transport(subunit, sp_site1, sp_site2, sc_site, min_size, max_size,
     if cdest().monomer is csource().monomer:
         cdest = cdest({c_site: None})
 
-    for size, klist in zip(range(min_size, max_size + 1), ktable):
+    # The rule-name labels are also size-invariant (bond numbers never appear
+    # in labels), so compute them once up front and share the per-size name
+    # stem between the two rules below, instead of re-deriving the labels
+    # through a naming callback for every rule. The label cache is keyed by
+    # id, so clear it first (as bind_table does) in case one of these fresh
+    # patterns was allocated at the recycled address of a dead one.
+    _label_cache.clear()
+    subunit_label = _monomer_pattern_label(subunit_free)
+    csource_label = _monomer_pattern_label(csource_free)
+    cdest_label = _monomer_pattern_label(cdest())
+
+    for size, klist in enumerate(ktable, start=min_size):
         # More aliases which do depend on pore size
         pore_free = pore_species(subunit_free, sp_site1, sp_site2, size)
 
@@ -1339,12 +1687,11 @@ def pore_transport(subunit, sp_site1, sp_site2, sc_site, min_size, max_size,
         # pore. We create partial patterns for bound pore and csource, using a
         # bond number that is high enough not to conflict with the bonds within
         # the pore ring itself.
-        # Start by copying pore_free, which has all cargo binding sites empty
-        pore_bound = pore_free.copy()
         # Get the next bond number not yet used in the pore structure itself
         cargo_bond_num = size + 1
-        # Assign that bond to the first subunit in the pore
-        pore_bound.monomer_patterns[0].site_conditions[sc_site] = cargo_bond_num
+        # Assign that bond to the first subunit in the pore; only that subunit
+        # is copied, the rest of the ring is shared with pore_free
+        pore_bound = _pore_bound_pattern(pore_free, sc_site, cargo_bond_num)
         # Create a cargo source pattern with that same bond
         csource_bound = csource({c_site: cargo_bond_num})
         # Finally we can define the complex trivially; the bond numbers are
@@ -1352,15 +1699,19 @@ def pore_transport(subunit, sp_site1, sp_site2, sc_site, min_size, max_size,
         pc_complex = pore_bound % csource_bound
 
         # Create the rules (just like catalyze)
-        name_func = functools.partial(pore_transport_rule_name, size=size)
-        components |= _macro_rule('pore_transport_complex',
-                                  pore_free + csource_free <> pc_complex,
-                                  klist[0:2], ['kf', 'kr'],
-                                  name_func=name_func)
-        components |= _macro_rule('pore_transport_dissociate',
-                                  pc_complex >> pore_free + cdest,
-                                  [klist[2]], ['kc'],
-                                  name_func=name_func)
+        name_stem = subunit_label + '_' + str(size) + '_'
+        complex_name = name_stem + csource_label
+        dissociate_name = name_stem + cdest_label
+        components.update(_macro_rule('pore_transport_complex',
+                                      pore_free + csource_free <> pc_complex,
+                                      klist[0:2], ['kf', 'kr'],
+                                      name_func=lambda expr,
+                                          _name=complex_name: _name))
+        components.update(_macro_rule('pore_transport_dissociate',
+                                      pc_complex >> pore_free + cdest,
+                                      [klist[2]], ['kc'],
+                                      name_func=lambda expr,
+                                          _name=dissociate_name: _name))
 
     return components
 
@@ -1436,31 +1787,25 @@ def pore_bind(subunit, sp_site1, sp_site2, sc_site, size, cargo, c_site,
 
     """
 
-    _verify_sites(subunit, sc_site)
-    _verify_sites(cargo, c_site)
-
-    def pore_bind_rule_name(rule_expression, size):
-        # Get ReactionPatterns
-        react_p = rule_expression.reactant_pattern
-        prod_p = rule_expression.product_pattern
-        # Build the label components
-        # Pore is always first complex of LHS due to how we build the rules
-        subunit = react_p.complex_patterns[0].monomer_patterns[0].monomer
-        if len(react_p.complex_patterns) == 2:
-            # This is the complexation reaction
-            cargo = react_p.complex_patterns[1].monomer_patterns[0]
-        else:
-            # This is the dissociation reaction
-            cargo = prod_p.complex_patterns[1].monomer_patterns[0]
-        return '%s_%d_%s' % (subunit.name, size,
-                             _monomer_pattern_label(cargo))
+    _verify_sites_cached(subunit, sc_site)
+    _verify_sites_cached(cargo, c_site)
 
     components = ComponentSet()
     # Set up some aliases that are invariant with pore size
     subunit_free = subunit({sc_site: None})
     cargo_free = cargo({c_site: None})
 
-    #for size, klist in zip(range(min_size, max_size + 1), ktable):
+    # Compute the rule name directly from the subunit and cargo rather than
+    # through a naming callback that would re-label the patterns inside
+    # _macro_rule (the cargo in the rule expression carries the same label
+    # as cargo_free; bond numbers are excluded from labels). Clear the
+    # id-keyed label cache first, as bind_table does, in case cargo_free was
+    # allocated at the recycled address of a dead pattern.
+    _label_cache.clear()
+    rule_name = (_monomer_of(subunit).name + '_' + str(size) + '_' +
+                 _monomer_pattern_label(cargo_free))
+
+    #for size, klist in enumerate(ktable, start=min_size):
 
     # More aliases which do depend on pore size
     pore_free = pore_species(subunit_free, sp_site1, sp_site2, size)
@@ -1470,12 +1815,11 @@ def pore_bind(subunit, sp_site1, sp_site2, sc_site, size, cargo, c_site,
     # pore. We create partial patterns for bound pore and cargo, using a
     # bond number that is high enough not to conflict with the bonds within
     # the pore ring itself.
-    # Start by copying pore_free, which has all cargo binding sites empty
-    pore_bound = pore_free.copy()
     # Get the next bond number not yet used in the pore structure itself
     cargo_bond_num = size + 1
-    # Assign that bond to the first subunit in the pore
-    pore_bound.monomer_patterns[0].site_conditions[sc_site] = cargo_bond_num
+    # Assign that bond to the first subunit in the pore; only that subunit is
+    # copied, the rest of the ring is shared with pore_free
+    pore_bound = _pore_bound_pattern(pore_free, sc_site, cargo_bond_num)
     # Create a cargo source pattern with that same bond
     cargo_bound = cargo({c_site: cargo_bond_num})
     # Finally we can define the complex trivially; the bond numbers are
@@ -1483,11 +1827,11 @@ def pore_bind(subunit, sp_site1, sp_site2, sc_site, size, cargo, c_site,
     pc_complex = pore_bound % cargo_bound
 
     # Create the rules
-    name_func = functools.partial(pore_bind_rule_name, size=size)
-    components |= _macro_rule('pore_bind',
-                              pore_free + cargo_free <> pc_complex,
-                              klist[0:2], ['kf', 'kr'],
-                              name_func=name_func)
+    components.update(_macro_rule('pore_bind',
+                                  pore_free + cargo_free <> pc_complex,
+                                  klist[0:2], ['kf', 'kr'],
+                                  name_func=lambda expr,
+                                      _name=rule_name: _name))
 
     return components
 